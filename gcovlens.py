@@ -19,21 +19,49 @@ Features
 import argparse
 import sys
 from pathlib import Path
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import os
 import re
-from typing import Dict, Set, Tuple, Optional, List, Any
+from typing import Dict, Set, Tuple, Optional, List, Any, Iterable, Iterator, Callable, TextIO, Union
 import html
 import hashlib
-
-LINE_RE = re.compile(r'^\s*(?P<count>-|#{5,}|={5,}|\d+)\s*:\s*(?P<lineno>\d+)\s*:(?P<rest>.*)$')
-HEADER_RE = re.compile(r'^\s*(?P<key>Source|Graph|Data|Runs):\s*(?P<val>.*)$')
+import mmap
+import pickle
+import shutil
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import islice
+
+# Both patterns run over the raw file bytes: one scan per file instead of
+# decoding and matching line by line.
+LINE_RE = re.compile(br'(?m)^[ \t]*(-|#{5,}|={5,}|\d+)[ \t]*:[ \t]*(\d+)[ \t]*:([^\r\n]*)')
+SOURCE_RE = re.compile(br'(?m)^[ \t]*Source:[ \t]*([^\r\n]*)')
+SOURCE_SCAN_BYTES = 4096  # the Source: header is expected to start within this prefix
+PARSE_WINDOW_BYTES = 1 << 20  # LINE_RE.findall runs over windows of about this size
+SHARED_TEXT_MAX_BYTES = 32  # repeats of shorter lines ('}', blanks) share one str per file
+_DASH, _HASH, _EQUALS = b'-#='
 
 CHANGE_THRESHOLD = 0.05  # percentage points
+PARALLEL_MIN_FILES = 8   # below this, process start-up costs more than it saves
+DETAIL_WRITE_BUFFER = 1 << 20  # bytes buffered per detail page before hitting disk
+CACHE_FILENAME = '.gcovlens_cache.pkl'  # per-run-directory parse cache
+CACHE_VERSION = 1  # bump whenever the parsed representation changes
+# The cached columns are raw array bytes, so a cache written by a machine
+# with another byte order or item sizes must not be reused.
+_CACHE_STAMP = (CACHE_VERSION, sys.byteorder, array('i').itemsize, array('q').itemsize)
+
+# Line kinds, stored per line in CoverageFile.kind and LineInfo.kind.
+# Executable kinds sort below the non-executable ones.
+KIND_COVERED, KIND_UNCOVERED, KIND_NONEXEC, KIND_NODATA = range(4)
+_KIND_MISSING = 4  # diff pages only: the line is absent from one run
+_KIND_STR = ('covered', 'uncovered', 'nonexec', 'nodata', 'missing')
 
 class LineInfo:
     __slots__ = ("lineno", "count", "covered", "text", "kind")
-    def __init__(self, lineno: int, count: Optional[int], covered: Optional[bool], text: str, kind: str):
-        # kind: 'covered', 'uncovered', 'nonexec', 'nodata'
+    def __init__(self, lineno: int, count: Optional[int], covered: Optional[bool], text: str, kind: int):
+        # kind: one of KIND_COVERED, KIND_UNCOVERED, KIND_NONEXEC, KIND_NODATA
         self.lineno = lineno
         self.count = count
         self.covered = covered
@@ -41,69 +69,147 @@ class LineInfo:
         self.kind = kind
 
 class CoverageFile:
+    """Coverage of one source file.
+
+    Lines are stored column-wise: ``lineno``, ``count`` (-1 when gcov has no
+    count), ``kind`` (a KIND_* code) and ``text`` are parallel and
+    sorted by unique line number. ``covered_arr``/``uncovered_arr`` hold the
+    sorted executable line numbers; install them with set_exec_lines() so the
+    ``n_covered``/``n_uncovered``/``n_total`` counts and ``percent`` stay in
+    step.
+    """
     def __init__(self, source: str):
         self.source = source
-        self.covered: Set[int] = set()
-        self.uncovered: Set[int] = set()
-        self.lines: Dict[int, LineInfo] = {}
+        self.lineno = array('i')
+        self.count = array('q')
+        self.kind = array('B')
+        self.text: List[str] = []
+        self.set_exec_lines(array('i'), array('i'))
+
+    def set_exec_lines(self, covered: array, uncovered: array) -> None:
+        self.covered_arr = covered
+        self.uncovered_arr = uncovered
+        self.n_covered = len(covered)
+        self.n_uncovered = len(uncovered)
+        self.n_total = self.n_covered + self.n_uncovered
+        self.percent = 100.0 * self.n_covered / self.n_total if self.n_total else 100.0
 
     @property
-    def total(self) -> int:
-        return len(self.covered) + len(self.uncovered)
+    def covered(self) -> Set[int]:
+        return set(self.covered_arr)
 
     @property
-    def percent(self) -> float:
-        if self.total == 0:
-            return 100.0
-        return 100.0 * len(self.covered) / self.total
+    def uncovered(self) -> Set[int]:
+        return set(self.uncovered_arr)
 
-def parse_gcov_file(path: Path) -> Optional[CoverageFile]:
-    source: Optional[str] = None
-    covered: Set[int] = set()
-    uncovered: Set[int] = set()
-    lines: Dict[int, LineInfo] = {}
+    @property
+    def lines(self) -> Dict[int, LineInfo]:
+        """Per-line records keyed by line number (built on demand)."""
+        out: Dict[int, LineInfo] = {}
+        for ln, n, k, text in zip(self.lineno, self.count, self.kind, self.text):
+            covered = None if k >= KIND_NONEXEC else k == KIND_COVERED
+            out[ln] = LineInfo(ln, None if n < 0 else n, covered, text, k)
+        return out
 
-    try:
-        with path.open('r', encoding='utf-8', errors='replace') as f:
-            for raw in f:
-                m = HEADER_RE.match(raw)
-                if m and m.group('key') == 'Source':
-                    source = m.group('val').strip()
-                    source = str(Path(source))
-                    continue
+    @property
+    def total(self) -> int:
+        return self.n_total
+
+@contextmanager
+def _mapped_file(path: Path):
+    """Yield a read-only buffer over ``path``: an mmap where possible, so the
+    file is paged in on demand rather than copied onto the heap, else its
+    bytes (empty files and filesystems without mmap support)."""
+    with path.open('rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            mm = None
+        if mm is None:
+            yield f.read()
+        else:
+            with mm:
+                yield mm
 
-                lm = LINE_RE.match(raw)
-                if not lm:
-                    continue
+def _line_fields(data) -> Iterator[Tuple[bytes, bytes, bytes]]:
+    """Yield the (count, lineno, text) groups of LINE_RE over ``data``.
 
-                count_tok = lm.group('count')
-                lineno = int(lm.group('lineno'))
-                text = lm.group('rest').rstrip('\n')
+    findall returns plain tuples (no Match object per line); running it over
+    line-aligned windows keeps a huge file from becoming one giant list.
+    """
+    pos, end = 0, len(data)
+    while pos < end:
+        stop = data.find(b'\n', pos + PARSE_WINDOW_BYTES)
+        stop = end if stop < 0 else stop + 1
+        yield from LINE_RE.findall(data, pos, stop)
+        pos = stop
 
-                if count_tok == '-':
-                    # Non-executable line, keep for context
-                    lines[lineno] = LineInfo(lineno, None, None, text, 'nonexec')
-                    continue
+def parse_gcov_file(path: Path) -> Optional[CoverageFile]:
+    source: Optional[str] = None
+    covered = array('i')
+    uncovered = array('i')
+    lineno_col = array('i')
+    count_col = array('q')
+    kind_col = array('B')
+    text_col: List[str] = []
+    short_text: Dict[bytes, str] = {}
+    in_order = True
+    exec_repeated = False
+    last = -1
 
-                if count_tok.startswith('====='):
+    try:
+        with _mapped_file(path) as data:
+            # The Source: header sits at the top of the file; look for it once
+            # instead of trying it against every line.
+            # endpos also clips the captured value, so extend the window to the
+            # end of the line that straddles it.
+            scan_end = data.find(b'\n', SOURCE_SCAN_BYTES)
+            hm = SOURCE_RE.search(data, 0, len(data) if scan_end < 0 else scan_end)
+            if hm:
+                source = str(Path(hm.group(1).decode('utf-8', 'replace').strip()))
+
+            for count_tok, lineno_tok, text_b in _line_fields(data):
+                lineno = int(lineno_tok)
+                c = count_tok[0]
+
+                if c == _DASH:
+                    # Non-executable line, keep for context
+                    n, kind = -1, KIND_NONEXEC
+                elif c == _EQUALS:
                     # No data available (e.g., not compiled)
-                    lines[lineno] = LineInfo(lineno, None, None, text, 'nodata')
-                    continue
-
-                if count_tok.startswith('#####'):
-                    uncovered.add(lineno)
-                    lines[lineno] = LineInfo(lineno, 0, False, text, 'uncovered')
+                    n, kind = -1, KIND_NODATA
+                elif c == _HASH:
+                    n, kind = 0, KIND_UNCOVERED
                 else:
-                    try:
-                        n = int(count_tok)
-                    except ValueError:
-                        continue
-                    if n > 0:
-                        covered.add(lineno)
-                        lines[lineno] = LineInfo(lineno, n, True, text, 'covered')
-                    else:
-                        uncovered.add(lineno)
-                        lines[lineno] = LineInfo(lineno, 0, False, text, 'uncovered')
+                    n = int(count_tok)
+                    kind = KIND_COVERED if n > 0 else KIND_UNCOVERED
+
+                if kind == KIND_COVERED:
+                    covered.append(lineno)
+                elif kind == KIND_UNCOVERED:
+                    uncovered.append(lineno)
+                if len(text_b) < SHARED_TEXT_MAX_BYTES:
+                    text = short_text.get(text_b)
+                    if text is None:
+                        text = short_text[text_b] = text_b.decode('utf-8', 'replace')
+                else:
+                    text = text_b.decode('utf-8', 'replace')
+                if lineno == last:
+                    # Consecutive records for one line, e.g. the "-: 0:" header
+                    # block (Source/Graph/Data/Runs): overwrite in place.
+                    if kind <= KIND_UNCOVERED:
+                        exec_repeated = True
+                    count_col[-1] = n
+                    kind_col[-1] = kind
+                    text_col[-1] = text
+                    continue
+                if lineno < last:
+                    in_order = False
+                last = lineno
+                lineno_col.append(lineno)
+                count_col.append(n)
+                kind_col.append(kind)
+                text_col.append(text)
     except Exception as e:
         print(f"WARNING: failed to parse {path}: {e}", file=sys.stderr)
         return None
@@ -112,15 +218,158 @@ def parse_gcov_file(path: Path) -> Optional[CoverageFile]:
         source = path.stem
 
     cf = CoverageFile(source)
-    cf.covered = covered
-    cf.uncovered = uncovered
-    cf.lines = lines
+    if not in_order:
+        # Line numbers that repeat out of order (e.g. template
+        # instantiations): the last record for a line wins.
+        last_idx = {ln: i for i, ln in enumerate(lineno_col)}
+        order = [last_idx[ln] for ln in sorted(last_idx)]
+        lineno_col = array('i', [lineno_col[i] for i in order])
+        count_col = array('q', [count_col[i] for i in order])
+        kind_col = array('B', [kind_col[i] for i in order])
+        text_col = [text_col[i] for i in order]
+    cf.lineno = lineno_col
+    cf.count = count_col
+    cf.kind = kind_col
+    cf.text = text_col
+    if not in_order or exec_repeated:
+        # Only then can the line arrays be unsorted or hold duplicates.
+        covered = array('i', sorted(set(covered)))
+        uncovered = array('i', sorted(set(uncovered)))
+    cf.set_exec_lines(covered, uncovered)
+    return cf
+
+def _pool_workers(n_jobs: int) -> int:
+    """Worker processes to start for ``n_jobs`` independent jobs: no more than
+    the jobs themselves or the CPUs this process may run on, and within the
+    executor's limit on Windows."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not on every platform
+        cpus = os.cpu_count() or 1
+    workers = min(n_jobs, cpus)
+    if sys.platform == 'win32':
+        workers = min(workers, 61)  # ProcessPoolExecutor rejects more there
+    return max(1, workers)
+
+def parse_gcov_files(paths: List[Path]) -> List[Optional[CoverageFile]]:
+    """Parse many .gcov files, in parallel worker processes when worthwhile.
+
+    Results are returned in the order of ``paths``.
+    """
+    workers = _pool_workers(len(paths))
+    if len(paths) < PARALLEL_MIN_FILES or workers < 2:
+        return [parse_gcov_file(p) for p in paths]
+    chunksize = max(1, len(paths) // (4 * workers))
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            return list(ex.map(parse_gcov_file, paths, chunksize=chunksize))
+    except (OSError, NotImplementedError, BrokenProcessPool) as e:
+        print(f"WARNING: parallel parsing unavailable ({e}); parsing serially", file=sys.stderr)
+        return [parse_gcov_file(p) for p in paths]
+
+class _CacheUnpickler(pickle.Unpickler):
+    """Unpickler for the parse cache: entries are plain builtins only, so no
+    global (class or function) may be loaded from the file."""
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"unexpected global {module}.{name} in parse cache")
+
+def _pack_coverage(cf: CoverageFile) -> tuple:
+    return (cf.source, cf.lineno.tobytes(), cf.count.tobytes(), cf.kind.tobytes(), cf.text,
+            cf.covered_arr.tobytes(), cf.uncovered_arr.tobytes())
+
+def _unpack_coverage(entry: tuple) -> CoverageFile:
+    """Rebuild a CoverageFile from _pack_coverage() output; raises TypeError or
+    ValueError when ``entry`` is malformed."""
+    source, lineno, count, kind, text, covered, uncovered = entry
+    if not isinstance(source, str) or not isinstance(text, list) or not set(map(type, text)) <= {str}:
+        raise TypeError("malformed parse cache entry")
+    cf = CoverageFile(source)
+    cf.lineno.frombytes(lineno)
+    cf.count.frombytes(count)
+    cf.kind.frombytes(kind)
+    cf.text = text
+    cov_arr = array('i')
+    cov_arr.frombytes(covered)
+    unc_arr = array('i')
+    unc_arr.frombytes(uncovered)
+    if not len(cf.lineno) == len(cf.count) == len(cf.kind) == len(text):
+        raise ValueError("parse cache entry columns differ in length")
+    if cf.kind and max(cf.kind) > KIND_NODATA:
+        raise ValueError("parse cache entry has an unknown line kind")
+    cf.set_exec_lines(cov_arr, unc_arr)
     return cf
 
-def load_dir(d: Path) -> Dict[str, CoverageFile]:
+def _load_parse_cache(d: Path) -> Dict[tuple, tuple]:
+    try:
+        with (d / CACHE_FILENAME).open('rb') as f:
+            payload = _CacheUnpickler(f).load()
+        if isinstance(payload, dict) and payload.get('version') == _CACHE_STAMP:
+            entries = payload.get('entries')
+            if isinstance(entries, dict):
+                return entries
+            print(f"WARNING: ignoring malformed parse cache in {d}", file=sys.stderr)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"WARNING: ignoring unreadable parse cache in {d}: {e}", file=sys.stderr)
+    return {}
+
+def _save_parse_cache(d: Path, entries: Dict[tuple, tuple]) -> None:
+    path = d / CACHE_FILENAME
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp.open('wb') as f:
+            pickle.dump({'version': _CACHE_STAMP, 'entries': entries}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)  # atomic: readers never see a partial cache
+    except OSError:
+        # Best effort only (e.g. a read-only run directory).
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+def _scan_dir(d: Path, use_cache: bool):
+    """First half of loading ``d``: list its .gcov files and fill what the
+    parse cache already has. Returns the state _finish_dir() needs, including
+    the (index, path, cache key) entries still to be parsed."""
+    paths = list(d.rglob('*.gcov'))
+    cache = _load_parse_cache(d) if use_cache else {}
+    fresh: Dict[tuple, tuple] = {}
+    results: List[Optional[CoverageFile]] = [None] * len(paths)
+    todo = []
+    for i, p in enumerate(paths):
+        try:
+            st = p.stat()
+            key = (p.relative_to(d).as_posix(), st.st_mtime_ns, st.st_size)
+        except OSError:
+            key = None
+        entry = cache.get(key)
+        cf = None
+        if entry is not None:
+            try:
+                cf = _unpack_coverage(entry)
+            except (TypeError, ValueError):
+                pass  # malformed entry: treat as a miss and re-parse
+        if cf is not None:
+            results[i] = cf
+            fresh[key] = entry
+        else:
+            todo.append((i, p, key))
+    return cache, fresh, results, todo
+
+def _finish_dir(d: Path, use_cache: bool, state, parsed: Iterable[Optional[CoverageFile]]) -> Dict[str, CoverageFile]:
+    """Second half of loading ``d``: merge the ``parsed`` results for the
+    todo entries of ``state``, refresh the cache and build the source map."""
+    cache, fresh, results, todo = state
+    for (i, p, key), cf in zip(todo, parsed):
+        results[i] = cf
+        if use_cache and cf is not None and key is not None:
+            fresh[key] = _pack_coverage(cf)
+    if use_cache and (todo or len(fresh) != len(cache)):
+        _save_parse_cache(d, fresh)
+
     mapping: Dict[str, CoverageFile] = {}
-    for p in d.rglob('*.gcov'):
-        cf = parse_gcov_file(p)
+    for cf in results:
         if cf is None:
             continue
         mapping[cf.source] = cf  # last wins
@@ -128,67 +377,99 @@ def load_dir(d: Path) -> Dict[str, CoverageFile]:
     if not mapping:
         codecov_dir = d / 'codecov'
         if codecov_dir.exists() and codecov_dir.is_dir():
-            return load_dir(codecov_dir)
+            return load_dir(codecov_dir, use_cache)
     return mapping
 
+def load_dirs(dirs: List[Path], use_cache: bool = True) -> List[Dict[str, CoverageFile]]:
+    """load_dir() for several directories at once.
+
+    The files none of the caches cover are parsed in a single
+    parse_gcov_files() batch, so one set of worker processes serves every
+    directory (e.g. both runs of a diff).
+    """
+    states = [_scan_dir(d, use_cache) for d in dirs]
+    parsed = iter(parse_gcov_files([p for st in states for _, p, _ in st[3]]))
+    return [_finish_dir(d, use_cache, st, islice(parsed, len(st[3]))) for d, st in zip(dirs, states)]
+
+def load_dir(d: Path, use_cache: bool = True) -> Dict[str, CoverageFile]:
+    """Parse every .gcov file under ``d`` into a {source: CoverageFile} map.
+
+    With ``use_cache``, parse results are kept in ``d/CACHE_FILENAME`` keyed by
+    (relative path, mtime, size), so unchanged files are not re-parsed on the
+    next run.
+    """
+    return load_dirs([d], use_cache)[0]
+
 def format_pct(x: float) -> str:
     return f"{x:.1f}%"
 
-def compute_diff(a: CoverageFile, b: CoverageFile):
-    all_exec_lines = a.covered | a.uncovered | b.covered | b.uncovered
-    became_covered = (b.covered - a.covered) & all_exec_lines
-    became_uncovered = (b.uncovered - a.uncovered) & all_exec_lines
+def _sorted_difference(b: array, a: array) -> array:
+    """Lines of sorted array ``b`` that are not in ``a``, still sorted."""
+    if a == b:
+        return array('i')
+    in_a = set(a)
+    return array('i', [ln for ln in b if ln not in in_a])
+
+def compute_diff(a: CoverageFile, b: CoverageFile) -> Tuple[array, array]:
+    """Return sorted line arrays (became_covered, became_uncovered) from A to B."""
+    became_covered = _sorted_difference(b.covered_arr, a.covered_arr)
+    became_uncovered = _sorted_difference(b.uncovered_arr, a.uncovered_arr)
     return became_covered, became_uncovered
 
 def aggregate_totals(files: List[CoverageFile]):
-    cov = sum(len(x.covered) for x in files)
-    tot = sum(x.total for x in files)
+    cov = sum(x.n_covered for x in files)
+    tot = sum(x.n_total for x in files)
     pct = (100.0 * cov / tot) if tot else 100.0
     return cov, tot, pct
 
 def aggregate_totals_pairs(pairs: List[Tuple[CoverageFile, CoverageFile]]):
-    cov_a = sum(len(x.covered) for x, _ in pairs)
-    tot_a = sum(x.total for x, _ in pairs)
-    cov_b = sum(len(y.covered) for _, y in pairs)
-    tot_b = sum(y.total for _, y in pairs)
+    cov_a = sum(x.n_covered for x, _ in pairs)
+    tot_a = sum(x.n_total for x, _ in pairs)
+    cov_b = sum(y.n_covered for _, y in pairs)
+    tot_b = sum(y.n_total for _, y in pairs)
     pct_a = (100.0 * cov_a / tot_a) if tot_a else 100.0
     pct_b = (100.0 * cov_b / tot_b) if tot_b else 100.0
     delta = pct_b - pct_a
     return cov_a, tot_a, pct_a, cov_b, tot_b, pct_b, delta
 
+_UNSAFE_NAME_RE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+@lru_cache(maxsize=None)
 def sanitize_detail_name(source: str) -> str:
-    """Return a filesystem-safe, stable file name for a detail page."""
+    """Return a filesystem-safe, stable file name for a detail page.
+
+    The name only uses ``[A-Za-z0-9_.-]``, so it needs no escaping in HTML
+    attributes or URLs.
+    """
     tail = Path(source).name
-    h = hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
-    safe_tail = re.sub(r'[^A-Za-z0-9_.-]+', '_', tail)
+    # 64-bit blake2b digest: cheaper per call than sha256 and ample to keep
+    # distinct sources apart within one report.
+    h = hashlib.blake2b(source.encode('utf-8'), digest_size=8).hexdigest()
+    safe_tail = _UNSAFE_NAME_RE.sub('_', tail)
     return f"{safe_tail}__{h}.html"
 
+_LANGUAGE_EXTS = [
+    (('f90','f95','f03','f08','f','for','f77'), 'fortran'),
+    (('hpp','hh','hxx','cpp','cc','cxx','cuh','cu'), 'cpp'),
+    (('h',), 'c'),
+    (('c',), 'c'),
+    (('py',), 'python'),
+    (('sh','bash'), 'bash'),
+    (('js',), 'javascript'),
+    (('ts',), 'typescript'),
+    (('java',), 'java'),
+    (('go',), 'go'),
+    (('rs',), 'rust'),
+]
+_EXT_TO_LANGUAGE = {ext: lang for exts, lang in _LANGUAGE_EXTS for ext in exts}
+
+@lru_cache(maxsize=None)
 def guess_language(source_path: str) -> str:
     """Best-effort mapping from file extension to highlight.js language class."""
-    s = source_path.lower()
-    mapping = [
-        (('f90','f95','f03','f08','f','for','f77'), 'fortran'),
-        (('hpp','hh','hxx','cpp','cc','cxx','cuh','cu'), 'cpp'),
-        (('h',), 'c'),
-        (('c',), 'c'),
-        (('py',), 'python'),
-        (('sh','bash'), 'bash'),
-        (('js',), 'javascript'),
-        (('ts',), 'typescript'),
-        (('java',), 'java'),
-        (('go',), 'go'),
-        (('rs',), 'rust'),
-    ]
-    for exts, lang in mapping:
-        for ext in exts:
-            if s.endswith('.' + ext):
-                return lang
-    return ''  # unknown => no explicit language
+    ext = source_path.rsplit('.', 1)[-1].lower() if '.' in source_path else ''
+    return _EXT_TO_LANGUAGE.get(ext, '')  # unknown => no explicit language
 
-def html_head(title: str, syntax: str = 'off', theme: str = 'github',
-              ui_font_size: Optional[int] = None, code_font_size: float = 12, code_line_height: float = 1.25) -> str:
-    ui_font_rule = f"font-size: {ui_font_size}px;" if ui_font_size else ""
-    css = """
+_CSS_TMPL = """
     <style>
     body { font-family: system-ui, -apple-system, Segoe UI, Roboto, sans-serif; margin: 24px; {UI_FONT_RULE} }
     h1, h2, h3 { margin: 0.6em 0 0.4em; }
@@ -262,11 +543,8 @@ def html_head(title: str, syntax: str = 'off', theme: str = 'github',
     }
     </style>
     """
-    css = css.replace("{UI_FONT_RULE}", ui_font_rule)
-    css = css.replace("{CODE_FONT_SIZE}", str(code_font_size))
-    css = css.replace("{CODE_LINE_HEIGHT}", str(code_line_height))
 
-    js_sorter = """
+_JS_SORTER = """
     <script>
     (function(){
       function getCellValue(td, type){
@@ -351,7 +629,7 @@ def html_head(title: str, syntax: str = 'off', theme: str = 'github',
     </script>
     """
 
-    js_minimap = """
+_JS_MINIMAP = """
     <script>
     (function(){
       function clamp(v,a,b){ return Math.max(a,Math.min(b,v)); }
@@ -361,45 +639,17 @@ def html_head(title: str, syntax: str = 'off', theme: str = 'github',
         if (!mini) return;
         const table = document.querySelector('table.sortable');
         if (!table || !table.tBodies[0]) return;
-        const rows = Array.from(table.tBodies[0].rows);
-        if (!rows.length) return;
-
-        // Build segments
-        const total = rows.length;
-        const segs = [];
-        let curState = null, startIdx = 0;
-        function rowState(r){
-          const s = r.getAttribute('data-state');
-          if (s) return s;
-          if (r.classList.contains('nonexec')) return 'nonexec';
-          if (r.classList.contains('nodata')) return 'nodata';
-          return 'covered';
-        }
-        rows.forEach((r, i) => {
-          const st = rowState(r);
-          if (curState === null) { curState = st; startIdx = i; return; }
-          if (st !== curState) { segs.push([startIdx, i, curState]); curState = st; startIdx = i; }
-        });
-        segs.push([startIdx, rows.length, curState]);
-
-        mini.innerHTML = '';
-        const frag = document.createDocumentFragment();
-        segs.forEach(([s, e, st]) => {
-          const seg = document.createElement('div');
-          seg.className = 'seg ' + st;
-          seg.style.top = (s / total * 100) + '%';
-          seg.style.height = (((e - s) / total) * 100) + '%';
-          seg.title = st;
-          seg.addEventListener('click', () => {
-            const target = rows[Math.min(s, rows.length - 1)];
-            if (target) target.scrollIntoView({ behavior: 'smooth', block: 'start' });
-          });
-          frag.appendChild(seg);
+        if (!table.tBodies[0].rows.length) return;
+
+        // Segments are emitted with the page; each jumps to its first row
+        mini.addEventListener('click', (e) => {
+          const seg = e.target.closest('.seg');
+          const target = seg && document.getElementById('L' + seg.getAttribute('data-line'));
+          if (target) target.scrollIntoView({ behavior: 'smooth', block: 'start' });
         });
         const view = document.createElement('div');
         view.className = 'view';
-        frag.appendChild(view);
-        mini.appendChild(frag);
+        mini.appendChild(view);
 
         // View math
         let viewFrac = 0;
@@ -499,215 +749,311 @@ def html_head(title: str, syntax: str = 'off', theme: str = 'github',
     </script>
     """
 
+_HLJS_CDN = "https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0"
+_HLJS_THEMES = {
+    'github': 'github.min.css',
+    'github-dark': 'github-dark.min.css',
+}
+
+@lru_cache(maxsize=32)
+def _html_head_tail(syntax: str, theme: str, ui_font_size: Optional[int],
+                    code_font_size: float, code_line_height: float) -> str:
+    """Render the part of <head> after <title>; it depends only on the styling
+    options, so it is built once per option set rather than once per page."""
+    ui_font_rule = f"font-size: {ui_font_size}px;" if ui_font_size else ""
+    css = _CSS_TMPL.replace("{UI_FONT_RULE}", ui_font_rule)
+    css = css.replace("{CODE_FONT_SIZE}", str(code_font_size))
+    css = css.replace("{CODE_LINE_HEIGHT}", str(code_line_height))
+
     # Optional syntax highlighting (via CDN)
     syntax_bits = ""
     if syntax == 'hljs':
-        theme_map = {
-            'github': 'github.min.css',
-            'github-dark': 'github-dark.min.css',
-        }
-        theme_file = theme_map.get(theme, 'github.min.css')
+        theme_file = _HLJS_THEMES.get(theme, 'github.min.css')
         syntax_bits = (
-            f"<link rel='stylesheet' href='https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/styles/{theme_file}'>"
-            "<script src='https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/highlight.min.js'></script>"
-            "<script src='https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/languages/fortran.min.js'></script>"
-            "<script src='https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/languages/c.min.js'></script>"
-            "<script src='https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/languages/cpp.min.js'></script>"
-            "<script src='https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/languages/python.min.js'></script>"
-            "<script src='https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/languages/bash.min.js'></script>"
+            f"<link rel='stylesheet' href='{_HLJS_CDN}/styles/{theme_file}'>"
+            f"<script src='{_HLJS_CDN}/highlight.min.js'></script>"
+            f"<script src='{_HLJS_CDN}/languages/fortran.min.js'></script>"
+            f"<script src='{_HLJS_CDN}/languages/c.min.js'></script>"
+            f"<script src='{_HLJS_CDN}/languages/cpp.min.js'></script>"
+            f"<script src='{_HLJS_CDN}/languages/python.min.js'></script>"
+            f"<script src='{_HLJS_CDN}/languages/bash.min.js'></script>"
             "<script>document.addEventListener('DOMContentLoaded', function(){ if(window.hljs){ hljs.highlightAll(); } });</script>"
         )
-    return f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(title)}</title>{css}{js_sorter}{js_minimap}{syntax_bits}</head>"
+    return f"{css}{_JS_SORTER}{_JS_MINIMAP}{syntax_bits}</head>"
 
-def is_blank(text: str) -> bool:
-    return text.strip() == ""
+def html_head(title: str, syntax: str = 'off', theme: str = 'github',
+              ui_font_size: Optional[int] = None, code_font_size: float = 12, code_line_height: float = 1.25) -> str:
+    tail = _html_head_tail(syntax, theme, ui_font_size, code_font_size, code_line_height)
+    return f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(title)}</title>{tail}"
 
-def is_comment(text: str) -> bool:
+_TEXT_CODE, _TEXT_BLANK, _TEXT_COMMENT = range(3)
+_COMMENT_STARTS = ('!', '//', '#', '/*', '*/')
+
+def classify_text(text: str) -> int:
+    """Classify a source line as _TEXT_BLANK (whitespace only), _TEXT_COMMENT
+    (comment-only, heuristic) or _TEXT_CODE, with one lstrip and one
+    startswith."""
     s = text.lstrip()
     if not s:
-        return False
-    return s.startswith('!') or s.startswith('//') or s.startswith('#') or s.startswith('/*') or s.startswith('*/')
-
-def write_diff_detail_page(outpath: Path, source: str, a: CoverageFile, b: CoverageFile,
-                           display_blank: bool, strip_comments: bool, syntax: str, theme: str,
-                           ui_font_size: Optional[int], code_font_size: float, code_line_height: float,
-                           breadcrumb_href: str):
-    all_lines = sorted(set(a.lines.keys()) | set(b.lines.keys()))
-    rows = []
-    for ln in all_lines:
-        la = a.lines.get(ln)
-        lb = b.lines.get(ln)
-        a_state = 'missing' if la is None else la.kind
-        b_state = 'missing' if lb is None else lb.kind
-        a_cnt = '' if la is None or la.count is None else str(la.count)
-        b_cnt = '' if lb is None or lb.count is None else str(lb.count)
-
-        # Prefer a non-empty code snippet from B, else A; fall back as needed
-        if lb is not None and lb.text and lb.text.strip():
-            text = lb.text
-        elif la is not None and la.text and la.text.strip():
-            text = la.text
-        elif lb is not None:
-            text = lb.text or ''
-        elif la is not None:
-            text = la.text or ''
-        else:
-            text = ''
-
-        # Only hide (never blank cells): for non-exec/no-data/missing on BOTH sides,
-        # hide if whitespace-only is to be hidden or comment-only is to be hidden.
-        hide_blank = not display_blank
-        if ((hide_blank and is_blank(text)) or (strip_comments and is_comment(text))):
-            nonexec_like_a = la is None or a_state in ('nonexec', 'nodata', 'missing')
-            nonexec_like_b = lb is None or b_state in ('nonexec', 'nodata', 'missing')
-            if nonexec_like_a and nonexec_like_b:
-                continue
+        return _TEXT_BLANK
+    return _TEXT_COMMENT if s.startswith(_COMMENT_STARTS) else _TEXT_CODE
+
+def hidden_text_classes(display_blank: bool, strip_comments: bool) -> frozenset:
+    """The classify_text() results to hide on non-exec lines of a detail page."""
+    hidden = set()
+    if not display_blank:
+        hidden.add(_TEXT_BLANK)
+    if strip_comments:
+        hidden.add(_TEXT_COMMENT)
+    return frozenset(hidden)
 
-        status = 'same'
-        if a_state != b_state:
-            if b_state == 'covered' and a_state != 'covered':
-                status = 'became_covered'
-            elif b_state == 'uncovered' and a_state != 'uncovered':
-                status = 'became_uncovered'
-            else:
-                status = 'changed'
-        rows.append((ln, a_cnt, b_cnt, a_state, b_state, text, status))
+def is_blank(text: str) -> bool:
+    return classify_text(text) == _TEXT_BLANK
 
+def is_comment(text: str) -> bool:
+    return classify_text(text) == _TEXT_COMMENT
+
+def _align_lines(a: CoverageFile, b: CoverageFile):
+    """Yield (lineno, index in a, index in b) over the union of both files'
+    lines, in line order; an index is None where that side lacks the line."""
+    if a.lineno == b.lineno:
+        for i, ln in enumerate(a.lineno):
+            yield ln, i, i
+        return
+    a_pos = dict(zip(a.lineno, range(len(a.lineno))))
+    b_pos = dict(zip(b.lineno, range(len(b.lineno))))
+    for ln in sorted(a_pos.keys() | b_pos.keys()):
+        yield ln, a_pos.get(ln), b_pos.get(ln)
+
+_DIFF_DETAIL_THEAD = ("<table class='sortable'><thead><tr>"
+                      "<th class='num' data-sort='num' aria-sort='asc'>Line<span class='caret'></span></th>"
+                      "<th class='num' data-sort='num' aria-sort='none'>A count<span class='caret'></span></th>"
+                      "<th class='num' data-sort='num' aria-sort='none'>B count<span class='caret'></span></th>"
+                      "<th data-sort='alpha' aria-sort='none'>A state<span class='caret'></span></th>"
+                      "<th data-sort='alpha' aria-sort='none'>B state<span class='caret'></span></th>"
+                      "<th data-sort='alpha' aria-sort='none'>Code<span class='caret'></span></th>"
+                      "</tr></thead><tbody>")
+_SINGLE_DETAIL_THEAD = ("<table class='sortable'><thead><tr>"
+                        "<th class='num' data-sort='num' aria-sort='asc'>Line<span class='caret'></span></th>"
+                        "<th class='num' data-sort='num' aria-sort='none'>Count<span class='caret'></span></th>"
+                        "<th data-sort='alpha' aria-sort='none'>State<span class='caret'></span></th>"
+                        "<th data-sort='alpha' aria-sort='none'>Code<span class='caret'></span></th>"
+                        "</tr></thead><tbody>")
+
+def _emit_detail_page(outpath: Union[str, Path], source: str, pills: List[str], thead: str,
+                      rows: Iterable[Tuple[int, str, str]],
+                      syntax: str, theme: str,
+                      ui_font_size: Optional[int], code_font_size: float, code_line_height: float,
+                      breadcrumb_href: str):
+    """Write a detail page shared by both modes: head, breadcrumb header with
+    ``pills``, then the ``thead`` table filled from the ``(line, state, tr)``
+    tuples in ``rows`` (streamed straight to disk), then the minimap.
+
+    Minimap segments are the runs of equal ``state`` collected while the rows
+    stream out, so the browser only has to position the view box."""
     parts = [html_head(f"gcovlens Detail — {source}", syntax=syntax, theme=theme,
                        ui_font_size=ui_font_size, code_font_size=code_font_size, code_line_height=code_line_height),
              "<body>"]
-    parts.append(f"<h1>gcovlens Detail — {html.escape(source)}</h1>")
-    covA = a.percent; covB = b.percent; delta = covB - covA
+    source_html = html.escape(source)
+    parts.append(f"<h1>gcovlens Detail — {source_html}</h1>")
     link_html = f"<a href='{html.escape(breadcrumb_href)}'>gcovlens Report</a>"
+    pills_html = "\n        ".join(f'<span class="pill">{p}</span>' for p in pills)
     parts.append(f"""
     <div class="header">
       <div class="breadcrumbs">
-        {link_html} / <strong>{html.escape(source)}</strong>
+        {link_html} / <strong>{source_html}</strong>
       </div>
       <div>
-        <span class="pill">A: {covA:.1f}%</span>
-        <span class="pill">B: {covB:.1f}%</span>
-        <span class="pill">Δ: {delta:+.1f}%</span>
+        {pills_html}
       </div>
     </div>
     """)
-    parts.append("<div id='minimap' class='minimap' title='Click or drag to navigate'></div>")
-
-    lang_cls = ('language-' + guess_language(source)) if guess_language(source) else ''
-    parts.append("<table class='sortable'><thead><tr>"
-                 "<th class='num' data-sort='num' aria-sort='asc'>Line<span class='caret'></span></th>"
-                 "<th class='num' data-sort='num' aria-sort='none'>A count<span class='caret'></span></th>"
-                 "<th class='num' data-sort='num' aria-sort='none'>B count<span class='caret'></span></th>"
-                 "<th data-sort='alpha' aria-sort='none'>A state<span class='caret'></span></th>"
-                 "<th data-sort='alpha' aria-sort='none'>B state<span class='caret'></span></th>"
-                 "<th data-sort='alpha' aria-sort='none'>Code<span class='caret'></span></th>"
-                 "</tr></thead><tbody>")
-    for (ln, a_cnt, b_cnt, a_state, b_state, text, status) in rows:
+    parts.append(thead)
+    segs = []  # (first row index, first line, state) per run
+    run_state = None
+    n = 0
+    with open(outpath, 'w', encoding='utf-8', buffering=DETAIL_WRITE_BUFFER) as f:
+        f.write("\n".join(parts))
+        f.write("\n")
+        for n, (ln, state, row) in enumerate(rows, 1):
+            f.write(row)
+            if state != run_state:
+                segs.append((n - 1, ln, state))
+                run_state = state
+        f.write("</tbody></table>\n")
+        f.write(_minimap_html(segs, n))
+        f.write("</body></html>")
+
+def _minimap_html(segs: List[Tuple[int, int, str]], total: int) -> str:
+    """The minimap ``<div>`` with one positioned segment per run in ``segs``."""
+    out = ["<div id='minimap' class='minimap' title='Click or drag to navigate'>"]
+    scale = 100 / total if total else 0
+    ends = [s[0] for s in segs[1:]]
+    ends.append(total)
+    for (start, ln, state), end in zip(segs, ends):
+        out.append(f"<div class='seg {state}' style='top:{start * scale:.4f}%;"
+                   f"height:{(end - start) * scale:.4f}%' data-line='{ln}' title='{state}'></div>")
+    out.append("</div>\n")
+    return "".join(out)
+
+def _code_cell_open(source: str) -> str:
+    """Opening of the code cell; the language class is fixed per page, so the
+    whole prefix is built once and reused for every row."""
+    lang = guess_language(source)
+    lang_cls = ('language-' + lang) if lang else ''
+    return f"<td><pre><code class='hljs {lang_cls}'>"
+
+def _diff_detail_rows(a: CoverageFile, b: CoverageFile, hidden: frozenset,
+                      code_open: str) -> Iterator[Tuple[int, str, str]]:
+    # Only the code text needs escaping; line numbers, counts and states
+    # are ints or fixed keywords.
+    for ln, ia, ib in _align_lines(a, b):
+        if ia is None:
+            ak, a_cnt, a_text = _KIND_MISSING, '', None
+        else:
+            ak = a.kind[ia]
+            a_cnt = '' if a.count[ia] < 0 else str(a.count[ia])
+            a_text = a.text[ia]
+        if ib is None:
+            bk, b_cnt, b_text = _KIND_MISSING, '', None
+        else:
+            bk = b.kind[ib]
+            b_cnt = '' if b.count[ib] < 0 else str(b.count[ib])
+            b_text = b.text[ib]
+
+        # Prefer a non-empty code snippet from B, else A; fall back as needed
+        if b_text and b_text.strip():
+            text = b_text
+        elif a_text and a_text.strip():
+            text = a_text
+        else:
+            text = b_text if b_text is not None else (a_text or '')
+
+        # non-exec, no-data or missing on both sides
+        both_quiet = ak >= KIND_NONEXEC and bk >= KIND_NONEXEC
+        # Only hide (never blank cells): for non-exec/no-data/missing on BOTH sides,
+        # hide if whitespace-only is to be hidden or comment-only is to be hidden.
+        if hidden and both_quiet and classify_text(text) in hidden:
+            continue
+
+        status = 'same'
+        if ak != bk:
+            if bk == KIND_COVERED:
+                status = 'became_covered'
+            elif bk == KIND_UNCOVERED:
+                status = 'became_uncovered'
+            else:
+                status = 'changed'
+
         classes = []
-        if a_state == 'nonexec' or b_state == 'nonexec':
+        if ak == KIND_NONEXEC or bk == KIND_NONEXEC:
             classes.append('nonexec')
-        if a_state == 'nodata' or b_state == 'nodata':
+        if ak == KIND_NODATA or bk == KIND_NODATA:
             classes.append('nodata')
         row_style = " style='background:#e6ffed'" if status=='became_covered' else (" style='background:#ffebee'" if status=='became_uncovered' else "")
         # minimap state:
         if status in ('became_covered', 'became_uncovered'):
             state_for_minimap = status
+        elif both_quiet:
+            state_for_minimap = 'nonexec' if KIND_NONEXEC in (ak, bk) else 'nodata'
         else:
-            if (a_state in ('nonexec', 'nodata', 'missing')) and (b_state in ('nonexec', 'nodata', 'missing')):
-                state_for_minimap = 'nonexec' if ('nonexec' in (a_state, b_state)) else 'nodata'
-            else:
-                state_for_minimap = 'same'
-        attrs = f" data-line='{ln}' data-state='{html.escape(str(state_for_minimap))}' id='L{ln}'"
-        parts.append(
+            state_for_minimap = 'same'
+        attrs = f" data-line='{ln}' data-state='{state_for_minimap}' id='L{ln}'"
+        yield ln, state_for_minimap, (
             f"<tr{attrs} class=\"{' '.join(classes)}\"{row_style}><td class='num'>{ln}</td>"
-            f"<td class='num'>{html.escape(str(a_cnt))}</td>"
-            f"<td class='num'>{html.escape(str(b_cnt))}</td>"
-            f"<td>{html.escape(str(a_state))}</td>"
-            f"<td>{html.escape(str(b_state))}</td>"
-            f"<td><pre><code class='hljs {lang_cls}'>{html.escape(text)}</code></pre></td></tr>"
+            f"<td class='num'>{a_cnt}</td>"
+            f"<td class='num'>{b_cnt}</td>"
+            f"<td>{_KIND_STR[ak]}</td>"
+            f"<td>{_KIND_STR[bk]}</td>"
+            f"{code_open}{html.escape(text)}</code></pre></td></tr>\n"
         )
-    parts.append("</tbody></table></body></html>")
-    outpath.write_text("\n".join(parts), encoding='utf-8')
 
-def write_single_detail_page(outpath: Path, source: str, cf: CoverageFile,
-                             display_blank: bool, strip_comments: bool, syntax: str, theme: str,
-                             ui_font_size: Optional[int], code_font_size: float, code_line_height: float,
-                             breadcrumb_href: str):
-    lines = []
-    for ln in sorted(cf.lines.keys()):
-        li = cf.lines[ln]
-        # filter non-exec/no-data if requested (hide-only; never blank cells)
-        if li.kind in ('nonexec','nodata'):
-            txt = li.text
-            hide_blank = not display_blank
-            if (hide_blank and is_blank(txt)) or (strip_comments and is_comment(txt)):
-                continue
-        # human-readable state
-        if li.kind == 'nonexec':
-            state = 'non-exec'
-        elif li.kind == 'nodata':
-            state = 'no-data'
-        elif li.kind == 'covered':
-            state = 'covered'
-        elif li.kind == 'uncovered':
-            state = 'uncovered'
-        else:
-            state = li.kind or ''
-        lines.append((ln, li.count if li.count is not None else '', state, li.text, li.kind))
+# Per-kind pieces of a single-run detail row, indexed by KIND_*
+_SINGLE_STATE_LABEL = ('covered', 'uncovered', 'non-exec', 'no-data')
+_SINGLE_ROW_CLASS = ('', '', 'nonexec', 'nodata')
+_SINGLE_ROW_STYLE = (" style='background:#e6ffed'", " style='background:#ffebee'", '', '')
 
-    parts = [html_head(f"gcovlens Detail — {source}", syntax=syntax, theme=theme,
-                       ui_font_size=ui_font_size, code_font_size=code_font_size, code_line_height=code_line_height),
-             "<body>"]
-    parts.append(f"<h1>gcovlens Detail — {html.escape(source)}</h1>")
-    link_html = f"<a href='{html.escape(breadcrumb_href)}'>gcovlens Report</a>"
-    parts.append(f"""
-    <div class="header">
-      <div class="breadcrumbs">
-        {link_html} / <strong>{html.escape(source)}</strong>
-      </div>
-      <div>
-        <span class="pill">Coverage: {cf.percent:.1f}%</span>
-        <span class="pill">Covered: {len(cf.covered)}</span>
-        <span class="pill">Total: {cf.total}</span>
-      </div>
-    </div>
-    """)
-    parts.append("<div id='minimap' class='minimap' title='Click or drag to navigate'></div>")
+def _single_detail_rows(cf: CoverageFile, hidden: frozenset,
+                        code_open: str) -> Iterator[Tuple[int, str, str]]:
+    # As in the diff page, only the code text needs escaping.
+    # cf.lineno is already sorted and unique
+    for ln, n, k, text in zip(cf.lineno, cf.count, cf.kind, cf.text):
+        # filter non-exec/no-data if requested (hide-only; never blank cells)
+        if hidden and k >= KIND_NONEXEC and classify_text(text) in hidden:
+            continue
+        cnt = n if n >= 0 else ''
+        state = _KIND_STR[k]
+        attrs = f" data-line='{ln}' data-state='{state}' id='L{ln}'"
+        yield ln, state, (
+            f"<tr{attrs} class=\"{_SINGLE_ROW_CLASS[k]}\"{_SINGLE_ROW_STYLE[k]}><td class='num'>{ln}</td>"
+            f"<td class='num'>{cnt}</td>"
+            f"<td>{_SINGLE_STATE_LABEL[k]}</td>"
+            f"{code_open}{html.escape(text)}</code></pre></td></tr>\n"
+        )
 
-    lang_cls = ('language-' + guess_language(source)) if guess_language(source) else ''
-    parts.append("<table class='sortable'><thead><tr>"
-                 "<th class='num' data-sort='num' aria-sort='asc'>Line<span class='caret'></span></th>"
-                 "<th class='num' data-sort='num' aria-sort='none'>Count<span class='caret'></span></th>"
-                 "<th data-sort='alpha' aria-sort='none'>State<span class='caret'></span></th>"
-                 "<th data-sort='alpha' aria-sort='none'>Code<span class='caret'></span></th>"
-                 "</tr></thead><tbody>")
+def write_diff_detail_page(outpath: Union[str, Path], source: str, a: CoverageFile, b: CoverageFile,
+                           display_blank: bool, strip_comments: bool, syntax: str, theme: str,
+                           ui_font_size: Optional[int], code_font_size: float, code_line_height: float,
+                           breadcrumb_href: str):
+    covA = a.percent; covB = b.percent; delta = covB - covA
+    pills = [f"A: {covA:.1f}%", f"B: {covB:.1f}%", f"Δ: {delta:+.1f}%"]
+    rows = _diff_detail_rows(a, b, hidden_text_classes(display_blank, strip_comments), _code_cell_open(source))
+    _emit_detail_page(outpath, source, pills, _DIFF_DETAIL_THEAD, rows, syntax, theme,
+                      ui_font_size, code_font_size, code_line_height, breadcrumb_href)
 
-    for ln, cnt, state, text, kind in lines:
-        classes = []
-        if kind == 'nonexec':
-            classes.append('nonexec')
-        if kind == 'nodata':
-            classes.append('nodata')
+def write_single_detail_page(outpath: Union[str, Path], source: str, cf: CoverageFile,
+                             display_blank: bool, strip_comments: bool, syntax: str, theme: str,
+                             ui_font_size: Optional[int], code_font_size: float, code_line_height: float,
+                             breadcrumb_href: str):
+    pills = [f"Coverage: {cf.percent:.1f}%", f"Covered: {cf.n_covered}", f"Total: {cf.n_total}"]
+    rows = _single_detail_rows(cf, hidden_text_classes(display_blank, strip_comments), _code_cell_open(source))
+    _emit_detail_page(outpath, source, pills, _SINGLE_DETAIL_THEAD, rows, syntax, theme,
+                      ui_font_size, code_font_size, code_line_height, breadcrumb_href)
 
-        # Highlight covered/uncovered
-        if kind == 'covered':
-            row_style = " style='background:#e6ffed'"
-        elif kind == 'uncovered':
-            row_style = " style='background:#ffebee'"
-        else:
-            row_style = ""
+def _write_detail_chunk(writer: Callable[..., None], tasks: List[tuple]) -> None:
+    for task in tasks:
+        writer(*task)
 
-        data_state = kind if kind in ('covered','uncovered','nonexec','nodata') else 'covered'
+def write_detail_pages(writer: Callable[..., None], tasks: List[tuple]) -> None:
+    """Call ``writer(*task)`` for every task.
 
-        attrs = f" data-line='{ln}' data-state='{html.escape(data_state)}' id='L{ln}'"
-        parts.append(
-            f"<tr{attrs} class=\"{' '.join(classes)}\"{row_style}><td class='num'>{ln}</td>"
-            f"<td class='num'>{html.escape(str(cnt))}</td>"
-            f"<td>{html.escape(state)}</td>"
-            f"<td><pre><code class='hljs {lang_cls}'>{html.escape(text)}</code></pre></td></tr>"
-        )
-    parts.append("</tbody></table></body></html>")
-    outpath.write_text("\n".join(parts), encoding='utf-8')
+    Pages are independent files and rendering them is CPU-bound, so larger
+    batches are spread over worker processes; ``writer`` and the task tuples
+    must therefore be picklable (module-level functions, plain data).
+    """
+    workers = _pool_workers(len(tasks))
+    if len(tasks) < PARALLEL_MIN_FILES or workers < 2:
+        _write_detail_chunk(writer, tasks)
+        return
+    chunksize = max(1, len(tasks) // (4 * workers))
+    # Only a pool that cannot start (or dies) falls back to serial writes; an
+    # exception raised by writer itself propagates unchanged.
+    fallback: Optional[BaseException] = None
+    try:
+        ex = ProcessPoolExecutor(max_workers=workers)
+    except (OSError, NotImplementedError) as e:
+        fallback = e
+    else:
+        with ex:
+            try:
+                # submitting the chunks is what starts the worker processes
+                futures = [ex.submit(_write_detail_chunk, writer, tasks[i:i + chunksize])
+                           for i in range(0, len(tasks), chunksize)]
+            except OSError as e:
+                fallback = e
+            else:
+                try:
+                    for fut in futures:
+                        fut.result()  # a failing page raises here
+                except BrokenProcessPool as e:
+                    fallback = e
+                except BaseException:
+                    for fut in futures:
+                        fut.cancel()  # skip the chunks still queued
+                    raise
+    if fallback is not None:
+        print(f"WARNING: parallel detail pages unavailable ({fallback}); writing serially", file=sys.stderr)
+        _write_detail_chunk(writer, tasks)
 
 def to_markdown_diff(rows, totals, show_lines):
     cov_a, tot_a, pct_a, cov_b, tot_b, pct_b, delta = totals
@@ -717,8 +1063,8 @@ def to_markdown_diff(rows, totals, show_lines):
     md.append("\n## File Summary (changed only)\n")
     md.append("| File | A % | B % | Δ % | +covered | +uncovered |")
     md.append("|---|---:|---:|---:|---:|---:|")
-    for r in rows:
-        md.append(f"| `{r['file']}` | {format_pct(r['a_pct'])} | {format_pct(r['b_pct'])} | {r['delta']:+.1f}% | {len(r['became_covered'])} | {len(r['became_uncovered'])} |")
+    md.extend([f"| `{r['file']}` | {format_pct(r['a_pct'])} | {format_pct(r['b_pct'])} | {r['delta']:+.1f}% | {len(r['became_covered'])} | {len(r['became_uncovered'])} |"
+               for r in rows])
     if show_lines and rows:
         md.append("\n## Line-level Changes\n")
         for r in rows:
@@ -726,9 +1072,9 @@ def to_markdown_diff(rows, totals, show_lines):
                 continue
             md.append(f"\n### `{r['file']}`\n")
             if r['became_covered']:
-                md.append("**Became covered:** " + ", ".join(map(str, sorted(r['became_covered']))))
+                md.append("**Became covered:** " + ", ".join(map(str, r['became_covered'])))
             if r['became_uncovered']:
-                md.append("\n**Became uncovered:** " + ", ".join(map(str, sorted(r['became_uncovered']))))
+                md.append("\n**Became uncovered:** " + ", ".join(map(str, r['became_uncovered'])))
             md.append("")
     return "\n".join(md)
 
@@ -740,12 +1086,45 @@ def to_markdown_single(files: List[CoverageFile]):
     md.append("\n## File Summary\n")
     md.append("| File | % Covered | Covered | Total | Uncovered |")
     md.append("|---|---:|---:|---:|---:|")
-    for cf in sorted(files, key=lambda x: x.percent):
-        md.append(f"| `{cf.source}` | {format_pct(cf.percent)} | {len(cf.covered)} | {cf.total} | {len(cf.uncovered)} |")
+    md.extend([f"| `{cf.source}` | {format_pct(cf.percent)} | {cf.n_covered} | {cf.n_total} | {cf.n_uncovered} |"
+               for cf in sorted(files, key=lambda x: x.percent)])
     return "\n".join(md)
 
+_DIFF_SUMMARY_THEAD = ("<table class='sortable'><thead><tr>"
+                       "<th data-sort='alpha' aria-sort='asc'>File<span class='caret'></span></th>"
+                       "<th class='num' data-sort='percent' aria-sort='none'>A %<span class='caret'></span></th>"
+                       "<th class='num' data-sort='percent' aria-sort='none'>B %<span class='caret'></span></th>"
+                       "<th class='num' data-sort='percent' aria-sort='none'>Δ %<span class='caret'></span></th>"
+                       "<th class='num' data-sort='num' aria-sort='none'>+covered<span class='caret'></span></th>"
+                       "<th class='num' data-sort='num' aria-sort='none'>+uncovered<span class='caret'></span></th>"
+                       "</tr></thead><tbody>")
+_SINGLE_SUMMARY_THEAD = ("<table class='sortable'><thead><tr>"
+                         "<th data-sort='alpha' aria-sort='asc'>File<span class='caret'></span></th>"
+                         "<th class='num' data-sort='percent' aria-sort='none'>% Covered<span class='caret'></span></th>"
+                         "<th class='num' data-sort='num' aria-sort='none'>Covered<span class='caret'></span></th>"
+                         "<th class='num' data-sort='num' aria-sort='none'>Total<span class='caret'></span></th>"
+                         "<th class='num' data-sort='num' aria-sort='none'>Uncovered<span class='caret'></span></th>"
+                         "</tr></thead><tbody>")
+_SUMMARY_FOOT = "</tbody></table></body></html>"
+# Delta cell class, indexed by ``delta >= 0``
+_DELTA_CLS = ('delta-neg', 'delta-pos')
+
+def _file_label(name: str, link: Optional[str]) -> str:
+    """File cell content for the summary tables, linked when a detail page exists.
+
+    ``link`` is an href that is already safe inside a quoted attribute (see
+    main(): an escaped details-dir name plus a sanitize_detail_name() file).
+    """
+    label = html.escape(name)
+    if link:
+        return f"<a class='filelink' href='{link}'><code>{label}</code></a>"
+    return f"<code>{label}</code>"
+
 def to_html_diff(rows, totals, detail_links: Dict[str, str],
-                 ui_font_size: Optional[int], code_font_size: float, code_line_height: float):
+                 ui_font_size: Optional[int], code_font_size: float, code_line_height: float,
+                 out_fp: TextIO):
+    """Write the diff summary page to ``out_fp``, one table row at a time, in
+    the order of ``rows`` (main() sorts them by file name)."""
     cov_a, tot_a, pct_a, cov_b, tot_b, pct_b, delta = totals
     parts = [html_head("gcovlens Diff", ui_font_size=ui_font_size, code_font_size=code_font_size, code_line_height=code_line_height),
              "<body>", "<h1>gcovlens Diff Report</h1>"]
@@ -753,42 +1132,32 @@ def to_html_diff(rows, totals, detail_links: Dict[str, str],
     <div class="grid">
       <div class="badge">Run A: {pct_a:.1f}% ({cov_a}/{tot_a})</div>
       <div class="badge">Run B: {pct_b:.1f}% ({cov_b}/{tot_b})</div>
-      <div class="badge">Δ: <span class="{ 'delta-pos' if (pct_b-pct_a)>=0 else 'delta-neg' }">{(pct_b-pct_a):+.1f}%</span></div>
+      <div class="badge">Δ: <span class="{_DELTA_CLS[(pct_b-pct_a) >= 0]}">{(pct_b-pct_a):+.1f}%</span></div>
     </div>
     """)
     parts.append("<h2>File Summary (changed only)</h2>")
-    parts.append("<table class='sortable'><thead><tr>"
-                 "<th data-sort='alpha' aria-sort='asc'>File<span class='caret'></span></th>"
-                 "<th class='num' data-sort='percent' aria-sort='none'>A %<span class='caret'></span></th>"
-                 "<th class='num' data-sort='percent' aria-sort='none'>B %<span class='caret'></span></th>"
-                 "<th class='num' data-sort='percent' aria-sort='none'>Δ %<span class='caret'></span></th>"
-                 "<th class='num' data-sort='num' aria-sort='none'>+covered<span class='caret'></span></th>"
-                 "<th class='num' data-sort='num' aria-sort='none'>+uncovered<span class='caret'></span></th>"
-                 "</tr></thead><tbody>")
+    parts.append(_DIFF_SUMMARY_THEAD)
+    out_fp.write("\n".join(parts))
+    out_fp.write("\n")
     if rows:
-        for r in sorted(rows, key=lambda R: R['file'].lower()):
-            cls = 'delta-pos' if r['delta'] >= 0 else 'delta-neg'
-            label = html.escape(r['file'])
-            link = detail_links.get(r['file'])
-            if link:
-                label = f"<a class='filelink' href='{html.escape(link)}'><code>{label}</code></a>"
-            else:
-                label = f"<code>{label}</code>"
-            parts.append(
-                f"<tr><td style='text-align:left'>{label}</td>"
-                f"<td class='num'>{r['a_pct']:.1f}%</td>"
-                f"<td class='num'>{r['b_pct']:.1f}%</td>"
-                f"<td class='num {cls}'>{r['delta']:+.1f}%</td>"
-                f"<td class='num'>{len(r['became_covered'])}</td>"
-                f"<td class='num'>{len(r['became_uncovered'])}</td></tr>"
-            )
+        out_fp.writelines(
+            f"<tr><td style='text-align:left'>{_file_label(r['file'], detail_links.get(r['file']))}</td>"
+            f"<td class='num'>{r['a_pct']:.1f}%</td>"
+            f"<td class='num'>{r['b_pct']:.1f}%</td>"
+            f"<td class='num {_DELTA_CLS[r['delta'] >= 0]}'>{r['delta']:+.1f}%</td>"
+            f"<td class='num'>{len(r['became_covered'])}</td>"
+            f"<td class='num'>{len(r['became_uncovered'])}</td></tr>\n"
+            for r in rows
+        )
     else:
-        parts.append("<tr><td colspan='6' style='text-align:center'>No coverage changes detected</td></tr>")
-    parts.append("</tbody></table></body></html>")
-    return "\n".join(parts)
+        out_fp.write("<tr><td colspan='6' style='text-align:center'>No coverage changes detected</td></tr>\n")
+    out_fp.write(_SUMMARY_FOOT)
 
 def to_html_single(files: List[CoverageFile], detail_links: Dict[str,str],
-                   ui_font_size: Optional[int], code_font_size: float, code_line_height: float):
+                   ui_font_size: Optional[int], code_font_size: float, code_line_height: float,
+                   out_fp: TextIO):
+    """Write the single-run summary page to ``out_fp``, one table row at a time,
+    in the order of ``files`` (main() sorts them by source name)."""
     cov, tot, pct = aggregate_totals(files)
     parts = [html_head("gcovlens Report", ui_font_size=ui_font_size, code_font_size=code_font_size, code_line_height=code_line_height),
              "<body>", "<h1>gcovlens Report</h1>"]
@@ -799,32 +1168,21 @@ def to_html_single(files: List[CoverageFile], detail_links: Dict[str,str],
     </div>
     """)
     parts.append("<h2>File Summary</h2>")
-    parts.append("<table class='sortable'><thead><tr>"
-                 "<th data-sort='alpha' aria-sort='asc'>File<span class='caret'></span></th>"
-                 "<th class='num' data-sort='percent' aria-sort='none'>% Covered<span class='caret'></span></th>"
-                 "<th class='num' data-sort='num' aria-sort='none'>Covered<span class='caret'></span></th>"
-                 "<th class='num' data-sort='num' aria-sort='none'>Total<span class='caret'></span></th>"
-                 "<th class='num' data-sort='num' aria-sort='none'>Uncovered<span class='caret'></span></th>"
-                 "</tr></thead><tbody>")
+    parts.append(_SINGLE_SUMMARY_THEAD)
+    out_fp.write("\n".join(parts))
+    out_fp.write("\n")
     if files:
-        for cf in sorted(files, key=lambda x: x.source.lower()):
-            label = html.escape(cf.source)
-            link = detail_links.get(cf.source)
-            if link:
-                label = f"<a class='filelink' href='{html.escape(link)}'><code>{label}</code></a>"
-            else:
-                label = f"<code>{label}</code>"
-            parts.append(
-                f"<tr><td style='text-align:left'>{label}</td>"
-                f"<td class='num'>{cf.percent:.1f}%</td>"
-                f"<td class='num'>{len(cf.covered)}</td>"
-                f"<td class='num'>{cf.total}</td>"
-                f"<td class='num'>{len(cf.uncovered)}</td></tr>"
-            )
+        out_fp.writelines(
+            f"<tr><td style='text-align:left'>{_file_label(cf.source, detail_links.get(cf.source))}</td>"
+            f"<td class='num'>{cf.percent:.1f}%</td>"
+            f"<td class='num'>{cf.n_covered}</td>"
+            f"<td class='num'>{cf.n_total}</td>"
+            f"<td class='num'>{cf.n_uncovered}</td></tr>\n"
+            for cf in files
+        )
     else:
-        parts.append("<tr><td colspan='5' style='text-align:center'>No executable lines found</td></tr>")
-    parts.append("</tbody></table></body></html>")
-    return "\n".join(parts)
+        out_fp.write("<tr><td colspan='5' style='text-align:center'>No executable lines found</td></tr>\n")
+    out_fp.write(_SUMMARY_FOOT)
 
 def main(argv=None):
     parser = argparse.ArgumentParser(description="Generate coverage or diff reports from GCC .gcov files.")
@@ -833,6 +1191,7 @@ def main(argv=None):
     parser.add_argument("--output", "-o", type=Path, default=None, help="Write report to this file (HTML or Markdown based on --format)")
     parser.add_argument("--format", "-f", choices=["html", "md"], default="html", help="Output format")
     parser.add_argument("--show-lines", action="store_true", help="(MD only) Include per-file line numbers that changed coverage state in diff mode.")
+    parser.add_argument("--no-cache", action="store_true", help=f"Do not read or write the {CACHE_FILENAME} parse cache in the run directories.")
     parser.add_argument("--details-dir", type=Path, default=None, help="(HTML) Directory to write per-file HTML detail pages. Default: <output>_files")
     parser.add_argument("--display-blank", action="store_true", help="In detail pages, show whitespace-only lines (non-exec/no-data only).")
     parser.add_argument("--strip-comments", action="store_true", help="In detail pages, hide comment-only lines (non-exec/no-data only; heuristic).")
@@ -883,9 +1242,10 @@ def main(argv=None):
             return 2
 
     if is_diff:
-        a_map = load_dir(args.run_a)
-        b_map = load_dir(args.run_b)
-        common = sorted(set(a_map.keys()) | set(b_map.keys()))
+        a_map, b_map = load_dirs([args.run_a, args.run_b], use_cache=not args.no_cache)
+        keys = set(a_map)
+        keys.update(b_map)
+        common = sorted(keys)
         rows: List[Dict[str, Any]] = []
         pairs: List[Tuple[CoverageFile, CoverageFile]] = []
         detail_links: Dict[str, str] = {}
@@ -893,59 +1253,78 @@ def main(argv=None):
         for key in common:
             a = a_map.get(key, CoverageFile(key))
             b = b_map.get(key, CoverageFile(key))
+            pairs.append((a, b))
+            if a.covered_arr == b.covered_arr and a.uncovered_arr == b.uncovered_arr:
+                continue  # unchanged: no line deltas and equal percentages
             became_covered, became_uncovered = compute_diff(a, b)
-            delta = b.percent - a.percent
-            include = abs(delta) >= CHANGE_THRESHOLD or became_covered or became_uncovered
-            if include:
+            a_pct = a.percent
+            b_pct = b.percent
+            delta = b_pct - a_pct
+            if abs(delta) >= CHANGE_THRESHOLD or became_covered or became_uncovered:
                 rows.append({
                     "file": key,
-                    "a_pct": a.percent,
-                    "b_pct": b.percent,
+                    "a_pct": a_pct,
+                    "b_pct": b_pct,
                     "delta": delta,
                     "became_covered": became_covered,
                     "became_uncovered": became_uncovered,
                     "a": a, "b": b,
                 })
-            pairs.append((a, b))
 
         totals = aggregate_totals_pairs(pairs)
 
         if args.format == "md":
-            out = to_markdown_diff(rows, totals, args.show_lines)
+            md = to_markdown_diff(rows, totals, args.show_lines)
+            render = lambda fp: fp.write(md)
         else:
+            rows.sort(key=lambda R: R['file'].lower())
             if details_dir is not None:
+                tasks = []
+                # Detail pages all live directly in details_dir
+                breadcrumb_href = os.path.relpath(args.output, start=details_dir).replace('\\','/')
+                link_prefix = html.escape(details_dir.name) + '/'
+                # Plain string joins: a Path per page costs more than the join
+                details_prefix = os.path.join(details_dir, '')
                 for r in rows:
                     fname = sanitize_detail_name(r['file'])
-                    detail_path = details_dir / fname
-                    breadcrumb_href = os.path.relpath(args.output, start=detail_path.parent).replace('\\','/')
-                    write_diff_detail_page(detail_path, r['file'], r['a'], r['b'],
-                                           args.display_blank, args.strip_comments,
-                                           args.syntax, args.syntax_theme,
-                                           args.ui_font_size, args.code_font_size, args.code_line_height,
-                                           breadcrumb_href=breadcrumb_href)
-                    detail_links[r['file']] = f"{details_dir.name}/{fname}"
-            out = to_html_diff(rows, totals, detail_links, args.ui_font_size, args.code_font_size, args.code_line_height)
+                    detail_path = details_prefix + fname
+                    tasks.append((detail_path, r['file'], r['a'], r['b'],
+                                  args.display_blank, args.strip_comments,
+                                  args.syntax, args.syntax_theme,
+                                  args.ui_font_size, args.code_font_size, args.code_line_height,
+                                  breadcrumb_href))
+                    detail_links[r['file']] = link_prefix + fname
+                write_detail_pages(write_diff_detail_page, tasks)
+            render = lambda fp: to_html_diff(rows, totals, detail_links, args.ui_font_size,
+                                             args.code_font_size, args.code_line_height, fp)
 
     else:
-        file_map = load_dir(args.run_a)
+        file_map = load_dir(args.run_a, use_cache=not args.no_cache)
         files = list(file_map.values())
         detail_links: Dict[str, str] = {}
 
         if args.format == "md":
-            out = to_markdown_single(files)
+            md = to_markdown_single(files)
+            render = lambda fp: fp.write(md)
         else:
+            files.sort(key=lambda x: x.source.lower())
             if details_dir is not None:
+                tasks = []
+                breadcrumb_href = os.path.relpath(args.output, start=details_dir).replace('\\','/')
+                link_prefix = html.escape(details_dir.name) + '/'
+                details_prefix = os.path.join(details_dir, '')
                 for cf in files:
                     fname = sanitize_detail_name(cf.source)
-                    detail_path = details_dir / fname
-                    breadcrumb_href = os.path.relpath(args.output, start=detail_path.parent).replace('\\','/')
-                    write_single_detail_page(detail_path, cf.source, cf,
-                                             args.display_blank, args.strip_comments,
-                                             args.syntax, args.syntax_theme,
-                                             args.ui_font_size, args.code_font_size, args.code_line_height,
-                                             breadcrumb_href=breadcrumb_href)
-                    detail_links[cf.source] = f"{details_dir.name}/{fname}"
-            out = to_html_single(files, detail_links, args.ui_font_size, args.code_font_size, args.code_line_height)
+                    detail_path = details_prefix + fname
+                    tasks.append((detail_path, cf.source, cf,
+                                  args.display_blank, args.strip_comments,
+                                  args.syntax, args.syntax_theme,
+                                  args.ui_font_size, args.code_font_size, args.code_line_height,
+                                  breadcrumb_href))
+                    detail_links[cf.source] = link_prefix + fname
+                write_detail_pages(write_single_detail_page, tasks)
+            render = lambda fp: to_html_single(files, detail_links, args.ui_font_size,
+                                               args.code_font_size, args.code_line_height, fp)
 
     # Write the summary (and index.html inside details dir for convenience)
     try:
@@ -954,9 +1333,12 @@ def main(argv=None):
         print(f"ERROR: could not create parent directory for output {args.output}: {e}", file=sys.stderr)
         return 2
     try:
+        with args.output.open('w', encoding='utf-8', buffering=DETAIL_WRITE_BUFFER) as fp:
+            render(fp)
         if args.format == "html" and details_dir is not None:
-            (details_dir / "index.html").write_text(out, encoding='utf-8')
-        args.output.write_text(out, encoding='utf-8')
+            index = details_dir / "index.html"
+            if index.resolve() != args.output.resolve():
+                shutil.copyfile(args.output, index)
     except FileNotFoundError as e:
         print(f"ERROR: could not write output file {args.output}: {e}", file=sys.stderr)
         return 2
@@ -39,11 +39,48 @@ def test_parse_gcov_file(tmp_path: Path):
     assert cf.source.endswith("src/foo.f90")
     assert cf.covered == {4}
     assert cf.uncovered == {2, 3}
-    assert cf.lines[1].kind == "nonexec"
-    assert cf.lines[5].kind == "nodata"
+    assert cf.lines[1].kind == gl.KIND_NONEXEC
+    assert cf.lines[5].kind == gl.KIND_NODATA
     assert cf.lines[4].count == 5 and cf.lines[4].covered is True
 
 
+def test_parse_gcov_file_columns(tmp_path: Path):
+    src = tmp_path / "b.gcov"
+    write_gcov(
+        src,
+        "src/bar.c",
+        [
+            ("-", 0, "Graph:bar.gcno"),
+            ("-", 0, "Runs:1"),
+            ("2", 3, "a();"),
+            ("-", 1, "// out of order"),
+            ("#####", 3, "a();"),
+        ],
+    )
+    cf = gl.parse_gcov_file(src)
+    # columns are sorted by unique line number; the last record for a line wins
+    assert list(cf.lineno) == [0, 1, 3]
+    assert cf.text[0] == "Runs:1"
+    assert cf.lines[3].kind == gl.KIND_UNCOVERED and cf.lines[3].count == 0
+    assert cf.lines[1].count is None
+    assert list(cf.covered_arr) == [3] and list(cf.uncovered_arr) == [3]
+
+    # in-order file with a line repeated in place: counted once
+    write_gcov(src, "src/bar.c", [("1", 4, "f();"), ("2", 4, "f();"), ("#####", 5, "g();")])
+    cf = gl.parse_gcov_file(src)
+    assert list(cf.covered_arr) == [4] and cf.total == 2
+
+
+def test_parse_gcov_file_source_across_scan_window(tmp_path: Path):
+    # a long Graph: record pushes the Source: header across the scan window
+    graph = "Graph:" + "g" * (gl.SOURCE_SCAN_BYTES - 16) + "\n"
+    src = tmp_path / "long.gcov"
+    src.write_text(graph + "Source: src/some/long/dir/name/file.c\n"
+                   "        1:    1:int x;\n", encoding="utf-8")
+    cf = gl.parse_gcov_file(src)
+    assert cf.source == str(Path("src/some/long/dir/name/file.c"))
+
+
 def test_compute_diff(tmp_path: Path):
     a_dir = tmp_path / "a"
     b_dir = tmp_path / "b"
@@ -57,8 +94,8 @@ def test_compute_diff(tmp_path: Path):
     a = a_map["src/foo.c"]
     b = b_map["src/foo.c"]
     became_cov, became_uncov = gl.compute_diff(a, b)
-    assert became_cov == {10}
-    assert became_uncov == set()
+    assert list(became_cov) == [10]
+    assert len(became_uncov) == 0
 
 
 def test_guess_language_and_sanitize():
@@ -70,3 +107,68 @@ def test_guess_language_and_sanitize():
     c = gl.sanitize_detail_name("/different/file.c")
     assert a == b
     assert a != c
+
+
+def test_load_dir_parse_cache(tmp_path: Path):
+    run = tmp_path / "run"
+    g = run / "foo.gcov"
+    write_gcov(g, "src/foo.c", [("#####", 1, "a();"), ("3", 2, "b();")])
+
+    first = gl.load_dir(run)["src/foo.c"]
+    assert (run / gl.CACHE_FILENAME).exists()
+
+    # a cached load reproduces the parsed columns
+    cached = gl.load_dir(run)["src/foo.c"]
+    assert list(cached.lineno) == list(first.lineno)
+    assert list(cached.count) == list(first.count)
+    assert cached.text == first.text
+    assert cached.covered == {2} and cached.uncovered == {1}
+
+    # rewriting the file (different size) invalidates its entry
+    write_gcov(g, "src/foo.c", [("7", 1, "a();"), ("3", 2, "b();"), ("-", 3, "}")])
+    updated = gl.load_dir(run)["src/foo.c"]
+    assert updated.covered == {1, 2} and list(updated.lineno) == [1, 2, 3]
+
+    # --no-cache leaves no cache behind
+    other = tmp_path / "other"
+    write_gcov(other / "bar.gcov", "src/bar.c", [("1", 1, "x();")])
+    assert "src/bar.c" in gl.load_dir(other, use_cache=False)
+    assert not (other / gl.CACHE_FILENAME).exists()
+
+
+def test_load_dir_ignores_malformed_cache(tmp_path: Path):
+    run = tmp_path / "run"
+    g = run / "foo.gcov"
+    write_gcov(g, "src/foo.c", [("#####", 1, "a();"), ("3", 2, "b();")])
+    st = g.stat()
+    key = ("foo.gcov", st.st_mtime_ns, st.st_size)
+    good = gl._pack_coverage(gl.parse_gcov_file(g))
+
+    bad_caches = [
+        [],                                    # entries not a dict
+        {key: (1, 2)},                         # wrong arity
+        {key: good[:1] + (b"\x01",) + good[2:]},  # truncated lineno column
+        {key: good[:4] + ([1, 2],) + good[5:]},  # text is not str
+    ]
+    for entries in bad_caches:
+        gl._save_parse_cache(run, entries)
+        cf = gl.load_dir(run)["src/foo.c"]
+        assert cf.covered == {2} and cf.uncovered == {1}
+
+    # a cache stamped for another byte order is not reused
+    (run / gl.CACHE_FILENAME).write_bytes(gl.pickle.dumps(
+        {"version": (gl.CACHE_VERSION, "other", 4, 8), "entries": {key: good[:1] + (b"x" * 8,) + good[2:]}}))
+    assert list(gl.load_dir(run)["src/foo.c"].lineno) == [1, 2]
+
+
+def test_load_dirs_keeps_runs_apart(tmp_path: Path):
+    a_dir, b_dir = tmp_path / "A", tmp_path / "B"
+    write_gcov(a_dir / "f.gcov", "src/f.c", [("#####", 1, "f();")])
+    write_gcov(b_dir / "f.gcov", "src/f.c", [("2", 1, "f();")])
+    write_gcov(b_dir / "g.gcov", "src/g.c", [("1", 1, "g();")])
+
+    a_map, b_map = gl.load_dirs([a_dir, b_dir], use_cache=False)
+    assert a_map["src/f.c"].uncovered == {1}
+    assert b_map["src/f.c"].covered == {1}
+    assert set(a_map) == {"src/f.c"}
+    assert set(b_map) == {"src/f.c", "src/g.c"}
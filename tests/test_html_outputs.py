@@ -1,6 +1,8 @@
 import sys, re, os
 from pathlib import Path
 
+import pytest
+
 # Make "src" importable without installing the package (works for src/gcovlens.py layout)
 ROOT = Path(__file__).resolve().parents[1]
 SRC = ROOT / "src"
@@ -90,6 +92,10 @@ def test_single_html_highlights_and_minimap(tmp_path: Path):
     assert 'data-state="covered"' in detail_html or "data-state='covered'" in detail_html
     assert 'data-state="uncovered"' in detail_html or "data-state='uncovered'" in detail_html
 
+    # minimap segments are emitted with the page, not built by the browser
+    assert "class='seg covered'" in detail_html
+    assert "class='seg uncovered'" in detail_html
+
 
 def test_diff_html_detail_changes_and_same_state(tmp_path: Path):
     a_dir = tmp_path / "A"
@@ -123,3 +129,40 @@ def test_diff_html_detail_changes_and_same_state(tmp_path: Path):
 
     # breadcrumb back to diff summary (accept relative)
     assert href_points_to(detail_html, out.name)
+
+
+def _force_cpus(monkeypatch, n):
+    monkeypatch.setattr(os, "cpu_count", lambda: n)
+    monkeypatch.delattr(os, "sched_getaffinity", raising=False)
+
+
+def test_detail_pages_on_worker_pool(tmp_path: Path, monkeypatch, capsys):
+    _force_cpus(monkeypatch, 4)
+    pools = []
+
+    class CountingPool(gl.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(kwargs.get("max_workers"))
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(gl, "ProcessPoolExecutor", CountingPool)
+    run = tmp_path / "run"
+    sources = [f"src/f{i}.c" for i in range(gl.PARALLEL_MIN_FILES)]
+    for i, src in enumerate(sources):
+        write_gcov(run / f"f{i}.gcov", src, [("1", 1, "f();"), ("#####", 2, "g();")])
+
+    out = tmp_path / "r.html"
+    assert run_cli([str(run), "--no-cache", "-o", str(out)]) == 0
+    assert pools and all(w == 4 for w in pools)  # parsing and detail pages both pooled
+    details_dir = out.with_name(out.stem + "_files")
+    for src in sources:
+        assert "data-state='uncovered'" in (details_dir / gl.sanitize_detail_name(src)).read_text(encoding="utf-8")
+    assert "WARNING" not in capsys.readouterr().err
+
+
+def test_detail_page_errors_are_not_retried(tmp_path: Path, monkeypatch, capsys):
+    _force_cpus(monkeypatch, 2)
+    tasks = [(str(tmp_path / f"missing{i}"),) for i in range(gl.PARALLEL_MIN_FILES)]
+    with pytest.raises(FileNotFoundError):
+        gl.write_detail_pages(os.rmdir, tasks)
+    assert "WARNING" not in capsys.readouterr().err